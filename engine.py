@@ -17,6 +17,8 @@ import os
 import time
 import logging
 import inspect
+import functools
+from importlib.util import find_spec
 
 import sgtk
 from sgtk import TankError
@@ -30,7 +32,59 @@ if not hasattr(ix, "shotgun"):
     # use a dummy class to keep references to menus
     ix.shotgun = lambda: None
     ix.shotgun.menu_callbacks = {}
-    
+
+# formatters used by the engine to give a standard format to log messages
+_DEBUG_FORMATTER = logging.Formatter("Debug: Shotgun %(basename)s: %(message)s")
+_INFO_FORMATTER = logging.Formatter("Shotgun %(basename)s: %(message)s")
+
+# debug messages are only displayed in Clarisse when TK_DEBUG is set, or
+# once debug logging has been turned on through set_debug
+_TK_DEBUG = os.environ.get("TK_DEBUG") == "1"
+
+def set_debug(flag):
+    """
+    Turn the display of debug messages in Clarisse on or off.
+
+    :param flag: True to display debug messages.
+    """
+    global _TK_DEBUG
+    _TK_DEBUG = bool(flag)
+
+# last formatted timestamp, as [seconds since epoch, formatted string]
+_ts_cache = [0, ""]
+
+def _now_str():
+    """
+    Returns the current local time formatted by time.asctime. The string is
+    only rebuilt once per second.
+
+    :return: The formatted time.
+    """
+    now = int(time.time())
+    cache = _ts_cache
+    if cache[0] != now:
+        cache[0] = now
+        cache[1] = time.asctime(time.localtime(now))
+    return cache[1]
+
+# resolved lazily by get_platform_resource_path
+_tank_platform_folder = None
+
+@functools.lru_cache(maxsize=None)
+def get_platform_resource_path(filename):
+    """
+    Returns the full path to the given platform resource file or folder.
+    Resources reside in the core/platform/qt folder.
+
+    :param filename: The name of the resource file.
+
+    :return: full path
+    """
+    global _tank_platform_folder
+    if _tank_platform_folder is None:
+        _tank_platform_folder = os.path.abspath(inspect.getfile(sgtk.platform))
+    return os.path.join(_tank_platform_folder, "qt", filename)
+
 def get_sgtk_root_menu(menu_name):
     """
     Get the root menu for the given menu name. If the menu does not exist, it
@@ -40,10 +94,11 @@ def get_sgtk_root_menu(menu_name):
     :return: The menu item handle.
     """
     menu = ix.application.get_main_menu()
+    menu_path = menu_name + ">"
 
-    sg_menu = menu.get_item(menu_name + ">")
+    sg_menu = menu.get_item(menu_path)
     if not sg_menu:
-        sg_menu = menu.add_command(menu_name + ">")
+        sg_menu = menu.add_command(menu_path)
     return sg_menu
 
 ############################################################################
@@ -52,23 +107,24 @@ class ClarisseEngine(sgtk.platform.Engine):
     """
     The engine class
     """
+    # Shadows the base class property so that the value detected at
+    # construction can be stored as a plain instance attribute.
+    has_ui = False
+
     def __init__(self, *args, **kwargs):
         # Detect if Clarisse is running in UI mode or not
-        self._ui_enabled = bool(ix.is_gui_application())
+        self.has_ui = bool(ix.is_gui_application())
+        self._host_info_cache = None
         super(ClarisseEngine, self).__init__(*args, **kwargs)
 
-    @property
-    def has_ui(self):
-        """
-        Detect and return if Clarisse is running with UI
-        """
-        return self._ui_enabled
-        
     @property
     def host_info(self):
         """
         :returns: A dictionary with information about the application hosting this engine.
         """
+        if self._host_info_cache is not None:
+            return self._host_info_cache
+
         host_info = {"name": "Clarisse", "version": "unknown"}
 
         try:
@@ -77,6 +133,7 @@ class ClarisseEngine(sgtk.platform.Engine):
         except:
             pass
 
+        self._host_info_cache = host_info
         return host_info
 
     def pre_app_init(self):
@@ -85,19 +142,25 @@ class ClarisseEngine(sgtk.platform.Engine):
         initialized.
         """
         # unicode characters returned by shotgun api need to be converted
-        # to display correctly in all of the app windows
-        
-        from sgtk.platform.qt import QtCore
-        
-        utf8 = QtCore.QTextCodec.codecForName("utf-8")
-        QtCore.QTextCodec.setCodecForCStrings(utf8)
+        # to display correctly in all of the app windows. The codec is
+        # global to the Qt session, so the flag is kept on ix.shotgun which
+        # outlives engine restarts, unlike this module.
+        if not getattr(ix.shotgun, "utf8_codec_set", False):
+            from sgtk.platform.qt import QtCore
+
+            utf8 = QtCore.QTextCodec.codecForName("utf-8")
+            QtCore.QTextCodec.setCodecForCStrings(utf8)
+            ix.shotgun.utf8_codec_set = True
+
+        # keep a reference to the log manager used by the logging commands
+        self._log_manager = LogManager()
         self.log_debug("Pre-app init complete...")
         
     def init_engine(self):
         """
         Initialize the Clarisse engine
         """
-        self.log_debug("%s: Initializing..." % self)
+        self.logger.debug("%s: Initializing...", self)
         
         # check that we are running Clarisse v3.6 or later
         current_os = os.sys.platform.lower()
@@ -105,14 +168,19 @@ class ClarisseEngine(sgtk.platform.Engine):
             raise TankError("Platform '%s' is not supported." % current_os)
         
         clarisse_build_version = ix.application.get_version()
-        clarisse_ver = float(".".join(clarisse_build_version.split(".")[:2]))
+        parts = clarisse_build_version.split(".", 2)
+        clarisse_ver = (int(parts[0]), int(parts[1]))
         
-        if clarisse_ver < 3.6:
+        if clarisse_ver < (3, 6):
             raise TankError(
                 "Clarisse v3.6 or later is required. Detected version: %s"
                 % clarisse_build_version
                 )
         
+        # bind the ix functions used to display messages now that
+        # ix.application is known to be available
+        _init_ix_bindings()
+
         # add qt paths
         self._init_pyside()
         
@@ -124,31 +192,26 @@ class ClarisseEngine(sgtk.platform.Engine):
         """
         Handles the pyside init
         """
-        # first see if pyside2 is present
-        try:
-            from PySide2 import QtGui
-        except:
-            self.logger.debug("PySide2 not detected - trying for PySide now...")
-        else:
+        # first see if pyside2 is present. find_spec checks the module can
+        # be found without importing it or raising when it is missing.
+        if find_spec("PySide2") is not None:
             # looks like pyside2 is already working! No need to do anything
             self.logger.debug(
                 "PySide2 detected - the existing version will be used."
             )
             return
+        self.logger.debug("PySide2 not detected - trying for PySide now...")
 
         # then see if pyside is present
-        try:
-            from PySide import QtGui
-        except:
-            self.logger.debug(
-                "PySide not detected - it will be added to the setup now..."
-            )
-        else:
+        if find_spec("PySide") is not None:
             # looks like pyside is already working! No need to do anything
             self.logger.debug(
                 "PySide detected - the existing version will be used."
             )
             return
+        self.logger.debug(
+            "PySide not detected - it will be added to the setup now..."
+        )
 
     def post_app_init(self):
         """
@@ -190,8 +253,8 @@ class ClarisseEngine(sgtk.platform.Engine):
         :param new_context: The new context being changed to.
         """
         # restore context menu's when context changed
-        with open("/RAPA/log.txt", "a") as f:
-            f.write("Context changed\n")
+        if _TK_DEBUG:
+            self.log_debug("Context changed")
         self.__register_open_log_folder_command()
         self.__register_reload_command()
         self.__register_toggle_debug_logging_command()
@@ -201,7 +264,7 @@ class ClarisseEngine(sgtk.platform.Engine):
         """
         Called when the engine is being destroyed
         """
-        self.log_debug("%s: Destroying..." % self)
+        self.logger.debug("%s: Destroying...", self)
 
         if self.has_ui:
             try:
@@ -266,38 +329,45 @@ class ClarisseEngine(sgtk.platform.Engine):
 ############################################################################
 # Overridden methods which set or reload the menu
 
-    def __get_platform_resource_path(self, filename):
-        """
-        Returns the full path to the given platform resource file or folder.
-        Resources reside in the core/platform/qt folder.
-        :return: full path
-        """
-        tank_platform_folder = os.path.abspath(inspect.getfile(sgtk.platform))
-        return os.path.join(tank_platform_folder, "qt", filename)
-    
     def __toggle_debug_logging(self):
         """
         Toggles global debug logging on and off in the log manager.
         This will affect all logging across all of toolkit.
         """
         # flip debug logging
-        LogManager().global_debug = not LogManager().global_debug
+        log_manager = self._log_manager
+        log_manager.global_debug = not log_manager.global_debug
+        set_debug(log_manager.global_debug)
 
     def __open_log_folder(self):
         """
         Opens the file system folder where log files are being stored.
         """
-        self.log_info("Log folder location: '%s'" % LogManager().log_folder)
+        log_folder = self._log_manager.log_folder
+        self.logger.info("Log folder location: '%s'", log_folder)
 
         if self.has_ui:
             # only import QT if we have a UI
             from sgtk.platform.qt import QtGui, QtCore
 
-            url = QtCore.QUrl.fromLocalFile(LogManager().log_folder)
+            url = QtCore.QUrl.fromLocalFile(log_folder)
             status = QtGui.QDesktopServices.openUrl(url)
             if not status:
                 self._engine.log_error("Failed to open folder!")
 
+    def __register_context_command(self, name, callback, properties):
+        """
+        Registers an engine context menu command, unless the engine already
+        knows a command with that name.
+
+        :param name: The name of the command.
+        :param callback: The callable to run when the command is executed.
+        :param properties: The properties of the command.
+        """
+        if name in self.commands:
+            return
+        self.register_command(name, callback, properties)
+
     def __register_open_log_folder_command(self):
         """
         # add a 'open log folder' command to the engine's context menu
@@ -305,12 +375,12 @@ class ClarisseEngine(sgtk.platform.Engine):
         # special case.
         """
         if self.name != SHOTGUN_ENGINE_NAME:
-            self.register_command(
+            self.__register_context_command(
                 "Open Log Folder",
                 self.__open_log_folder,
                 {
                     "short_name": "open_log_folder",
-                    "icon": self.__get_platform_resource_path("folder_256.png"),
+                    "icon": get_platform_resource_path("folder_256.png"),
                     "description": (
                         "Opens the folder where log files are being stored."
                     ),
@@ -325,12 +395,12 @@ class ClarisseEngine(sgtk.platform.Engine):
         """
         from sgtk.platform import restart
 
-        self.register_command(
+        self.__register_context_command(
             "Reload and Restart",
             restart,
             {
                 "short_name": "restart",
-                "icon": self.__get_platform_resource_path("reload_256.png"),
+                "icon": get_platform_resource_path("reload_256.png"),
                 "type": "context_menu",
             },
         )
@@ -342,12 +412,12 @@ class ClarisseEngine(sgtk.platform.Engine):
         # special case.
         """
         if self.name != SHOTGUN_ENGINE_NAME:
-            self.register_command(
+            self.__register_context_command(
                 "Toggle Debug Logging",
                 self.__toggle_debug_logging,
                 {
                     "short_name": "toggle_debug_logging",
-                    "icon": self.__get_platform_resource_path("folder_256.png"),
+                    "icon": get_platform_resource_path("folder_256.png"),
                     "description": (
                         "Toggles global debug logging on and off in the log manager."
                         "This will affect all logging across all of toolkit."
@@ -371,80 +441,98 @@ class ClarisseEngine(sgtk.platform.Engine):
         :param record: Standard python logging record.
         :type record: :class:`~python.logging.LogRecord`
         """
+        # Debug messages are not displayed unless debug is enabled, so drop
+        # them before formatting and dispatching to the main thread.
+        if record.levelno < logging.INFO and not _TK_DEBUG:
+            return
+
         # Give a standard format to the message:
         #     Shotgun <basename>: <message>
         # where "basename" is the leaf part of the logging record name,
         # for example "tk-multi-shotgunpanel" or "qt_importer".
         if record.levelno < logging.INFO:
-            formatter = logging.Formatter(
-                "Debug: Shotgun %(basename)s: %(message)s"
-            )
+            formatter = _DEBUG_FORMATTER
         else:
-            formatter = logging.Formatter("Shotgun %(basename)s: %(message)s")
+            formatter = _INFO_FORMATTER
 
         msg = formatter.format(record)
 
-        # Select Clarisse display function to use according to the logging
-        # record level.
-        if record.levelno >= logging.ERROR:
-            fct = display_error
-        elif record.levelno >= logging.WARNING:
-            fct = display_warning
-        elif record.levelno >= logging.INFO:
-            fct = display_info
-        else:
-            fct = display_debug
+        # Select Clarisse display function and message prefix to use
+        # according to the logging record level.
+        _init_ix_bindings()
+        for threshold, fct, prefix in _level_dispatch:
+            if record.levelno >= threshold:
+                break
 
         # Display the message in Clarisse script editor in a thread safe manner
-        self.async_execute_in_main_thread(fct, msg)
+        self.async_execute_in_main_thread(fct, _now_str() + prefix + msg)
+
+# prefixes of the messages displayed in the Clarisse log, by severity. They
+# go between the timestamp and the message.
+_ERROR_PREFIX = " - Shotgun Error | Clarisse engine | "
+_WARNING_PREFIX = " - Shotgun Warning | Clarisse engine | "
+_INFO_PREFIX = " - Shotgun Info | Clarisse engine | "
+_DEBUG_PREFIX = " - Shotgun Debug | Clarisse engine | "
+
+# ix bindings used by the show_* helpers and _emit_log_message. They are
+# resolved by _init_ix_bindings from init_engine, or on first use if a
+# message is shown earlier, since ix.application may not be ready when this
+# module is imported.
+_app = None
+_cancel = None
+_style_ok = None
+_log_error = None
+
+# (level threshold, display function, message prefix), highest level first
+_level_dispatch = ()
+
+def _init_ix_bindings():
+    """
+    Resolve the ix application functions and dialog constants used to
+    display messages in Clarisse.
+    """
+    global _app, _cancel, _style_ok, _log_error, _level_dispatch
+    if _app is not None:
+        return
+    _cancel = ix.api.AppDialog.cancel()
+    _style_ok = ix.api.AppDialog.STYLE_OK
+    _log_error = ix.application.log_error
+    _level_dispatch = (
+        (logging.ERROR, _print_and_log_error, _ERROR_PREFIX),
+        (logging.WARNING, ix.application.log_warning, _WARNING_PREFIX),
+        (logging.INFO, ix.application.log_info, _INFO_PREFIX),
+        (logging.NOTSET, ix.application.log_info, _DEBUG_PREFIX),
+    )
+    _app = ix.application
+
+def _print_and_log_error(line):
+    print(line)
+    _log_error(line)
 
 def show_error(msg):
+    _init_ix_bindings()
     print("Shotgun Error | Clarisse engine | %s " % msg)
-    ix.application.message_box(
+    _app.message_box(
         msg,
         ("Shotgun Error | Clarisse engine"),
-        ix.api.AppDialog.cancel(),
-        ix.api.AppDialog.STYLE_OK,
+        _cancel,
+        _style_ok,
     )
 
 def show_warning(msg):
-    ix.application.message_box(
+    _init_ix_bindings()
+    _app.message_box(
         msg,
         ("Shotgun Warning | Clarisse engine"),
-        ix.api.AppDialog.cancel(),
-        ix.api.AppDialog.STYLE_OK,
+        _cancel,
+        _style_ok,
     )
 
 def show_info(msg):
-    ix.application.message_box(
+    _init_ix_bindings()
+    _app.message_box(
         msg,
         ("Shotgun Info | Clarisse engine"),
-        ix.api.AppDialog.cancel(),
-        ix.api.AppDialog.STYLE_OK,
+        _cancel,
+        _style_ok,
     )
-
-def display_error(msg):
-    t = time.asctime(time.localtime())
-    print("%s - Shotgun Error | Clarisse engine | %s " % (t, msg))
-    ix.application.log_error(
-        ("%s - Shotgun Error | Clarisse engine | %s " % (t, msg))
-    )
-
-def display_warning(msg):
-    t = time.asctime(time.localtime())
-    ix.application.log_warning(
-        ("%s - Shotgun Warning | Clarisse engine | %s " % (t, msg))
-    )
-
-def display_info(msg):
-    t = time.asctime(time.localtime())
-    ix.application.log_info(
-        ("%s - Shotgun Info | Clarisse engine | %s " % (t, msg))
-    )
-
-def display_debug(msg):
-    if os.environ.get("TK_DEBUG") == "1":
-        t = time.asctime(time.localtime())
-        ix.application.log_info(
-        ("%s - Shotgun Debug | Clarisse engine | %s " % (t, msg))
-    )
\ No newline at end of file
@@ -14,6 +14,7 @@ Menu handling for Clarisse
 import sys
 import os
 import traceback
+import subprocess
 
 import sgtk
 from PySide2 import QtGui, QtCore
@@ -32,6 +33,13 @@ class MenuGenerator(object):
         self._main_menu_handle = ix.application.get_main_menu()
         self._dialogs = []
 
+        # shotgun url of the context it was resolved for, see _jump_to_sg
+        self._url_ctx = None
+        self._ctx_url = None
+
+        # app instance names keyed by app object id, filled by create_menu
+        self._app_instance_to_name = {}
+
     ###########################################################################
     # public methods
 
@@ -41,66 +49,77 @@ class MenuGenerator(object):
         In order to have commands enable/disable themselves based on the  
         enable_callback, re-create the menu items every time.
         """
-        self._menu_handle.remove_all_commands()
+        # suspend Clarisse updates while the menu items are added one by one
+        # so the menu is only refreshed once
+        ix.application.disable()
+        try:
+            self._menu_handle.remove_all_commands()
 
-        # now add the context item on top of the main menu
-        self._context_menu = self._add_context_menu()
+            # now add the context item on top of the main menu
+            self._context_menu = self._add_context_menu()
 
-        # add menu divider
-        self._add_divider(self._menu_name)
+            # add menu divider
+            self._add_divider(self._menu_name)
 
-        # now enumerate all items and create menu objects for them
-        menu_items = []
-        for (cmd_name, cmd_details) in self._engine.commands.items():
-            self._engine.log_debug(
-                "engine command: %s : %s" % (cmd_name, cmd_details)
+            # index the app instance names looked up by the menu items
+            self._app_instance_to_name = dict(
+                (id(app_instance_obj), app_instance_name)
+                for (app_instance_name, app_instance_obj)
+                in self._engine.apps.items()
             )
-            menu_items.append(AppCommand(cmd_name, self, cmd_details))
-
-        # sort list of commands in name order
-        menu_items.sort(key=lambda x: x.name)
-
-        # now add favourites
-        for fav in self._engine.get_setting("menu_favourites"):
-            app_instance_name = fav["app_instance"]
-            menu_name = fav["name"]
 
-            # scan through all menu items
-            for cmd in menu_items:
-                if (
-                    cmd.get_app_instance_name() == app_instance_name
-                    and cmd.name == menu_name
-                ):
+            # now enumerate all items and create menu objects for them
+            menu_items = []
+            for (cmd_name, cmd_details) in self._engine.commands.items():
+                self._engine.logger.debug(
+                    "engine command: %s : %s", cmd_name, cmd_details
+                )
+                menu_items.append(AppCommand(cmd_name, self, cmd_details))
+
+            # sort list of commands in name order
+            menu_items.sort(key=lambda x: x.name)
+
+            # now add favourites
+            menu_items_by_key = dict(
+                ((cmd.get_app_instance_name(), cmd.name), cmd)
+                for cmd in menu_items
+            )
+            for fav in self._engine.get_setting("menu_favourites"):
+                cmd = menu_items_by_key.get((fav["app_instance"], fav["name"]))
+                if cmd is not None:
                     # found our match!
                     cmd.add_command_to_menu(self._menu_name)
                     # mark as a favourite item
                     cmd.favourite = True
 
-        # add menu divider
-        self._add_divider(self._menu_name)
+            # add menu divider
+            self._add_divider(self._menu_name)
 
-        # now go through all of the menu items.
-        # separate them out into various sections
-        commands_by_app = {}
+            # now go through all of the menu items.
+            # separate them out into various sections
+            commands_by_app = {}
 
-        for cmd in menu_items:
-            if cmd.get_type() == "context_menu":
-                # context menu!
-                cmd.add_command_to_menu(self._context_menu)
+            for cmd in menu_items:
+                if cmd.get_type() == "context_menu":
+                    # context menu!
+                    cmd.add_command_to_menu(self._context_menu)
+
+                else:
+                    # normal menu
+                    app_name = cmd.get_app_name()
+                    if app_name is None:
+                        # un-parented app
+                        app_name = "Other Items"
+                    if not app_name in commands_by_app:
+                        commands_by_app[app_name] = []
+                    commands_by_app[app_name].append(cmd)
+
+            # now add all apps to main menu
+            self._add_app_menu(commands_by_app)
+        finally:
+            ix.application.enable()
+            ix.application.check_for_events()
 
-            else:
-                # normal menu
-                app_name = cmd.get_app_name()
-                if app_name is None:
-                    # un-parented app
-                    app_name = "Other Items"
-                if not app_name in commands_by_app:
-                    commands_by_app[app_name] = []
-                commands_by_app[app_name].append(cmd)
-
-        # now add all apps to main menu
-        self._add_app_menu(commands_by_app)
-        
     def destroy_menu(self):
         """
         Destroys the entire Shotgun menu
@@ -174,7 +193,12 @@ class MenuGenerator(object):
         """
         Jump to shotgun, launch web browser
         """
-        url = self._engine.context.shotgun_url
+        # only resolve the url again when the context changed
+        ctx = self._engine.context
+        if ctx is not self._url_ctx:
+            self._url_ctx = ctx
+            self._ctx_url = ctx.shotgun_url
+        url = self._ctx_url
         if url:
             if os.sys.platform.startswith("linux"):
                 os.system("xdg-open '%s'" % url)
@@ -187,16 +211,25 @@ class MenuGenerator(object):
         """
         Jump from context to FS
         """
-        # launch one window for each location on disk
+        # find out how to open a location on this platform, windows opens
+        # them with os.startfile
+        if os.sys.platform.startswith("linux"):
+            open_cmd = "xdg-open"
+        elif os.sys.platform.startswith("win"):
+            open_cmd = None
+        elif os.sys.platform.startswith("darwin"):
+            open_cmd = "open"
+        else:
+            return
+
+        # launch one window for each location on disk. The commands are not
+        # waited on so that all the windows open at once.
         paths = self._engine.context.filesystem_locations
         for disk_location in paths:
-            
-            if os.sys.platform.startswith("linux"):
-                os.system("xdg-open '%s'" % disk_location)
-            elif os.sys.platform.startswith("win"):
+            if open_cmd is None:
                 os.startfile(disk_location)
-            elif os.sys.platform.startswith("darwin"):
-                os.system("open '%s'" % disk_location)
+            else:
+                subprocess.Popen([open_cmd, disk_location], close_fds=True)
 
     ###########################################################################
     # app menus
@@ -211,10 +244,10 @@ class MenuGenerator(object):
                 # make a sub menu and put all items in the sub menu
                 app_menu = self._add_sub_menu(app_name, self._menu_name)
 
-                # get the list of menu cmds for this app
+                # get the list of menu cmds for this app. They are already
+                # in alphabetical order since they were bucketed from the
+                # sorted menu items.
                 cmds = commands_by_app[app_name]
-                # make sure it is in alphabetical order
-                cmds.sort(key=lambda x: x.name)
 
                 for cmd in cmds:
                     cmd.add_command_to_menu(app_menu)
@@ -257,15 +290,7 @@ class AppCommand(object):
         if "app" not in self.properties:
             return None
 
-        app_instance = self.properties["app"]
-        engine = app_instance.engine
-
-        for (app_instance_name, app_instance_obj) in engine.apps.items():
-            if app_instance_obj == app_instance:
-                # found our app!
-                return app_instance_name
-
-        return None
+        return self.parent._app_instance_to_name.get(id(self.properties["app"]))
 
     def get_type(self):
         """
@@ -317,14 +342,11 @@ class AppCommand(object):
             ix.application.disable()
 
         except Exception:
-            (exc_type, exc_value, exc_traceback) = sys.exc_info()
             message = (
                 "Message: Shotgun encountered a problem excutin an action from"
-                " the Clarisse engine"
+                " the Clarisse engine\n"
             )
-            message += "Exception: %s - %s\n" % (exc_type, exc_value)
-            message += "Traceback (most recent call last):\n"
-            message += "\n".join(traceback.format_tb(exc_traceback))
+            message += "".join(traceback.format_exception(*sys.exc_info()))
 
             current_engine = sgtk.platform.current_engine()
             current_engine.logger.exception(message)